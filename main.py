@@ -176,7 +176,7 @@ def print_final_summary():
     print("  4. Timeline Data")
     print("     - data/ci_pipeline_timeline.json")
     print("     - data/iteration_tracker.json")
-    print("     - data/git_automation_history.json")
+    print("     - data/git_automation_history.jsonl")
     print("     - data/deployment_history.json")
     print()
     print("="*70)
@@ -42,7 +42,7 @@ def clean_data_files():
     print_step(1, "Cleaning old data files")
     
     data_dir = project_root / "data"
-    json_files = list(data_dir.glob("*.json"))
+    json_files = list(data_dir.glob("*.json")) + list(data_dir.glob("*.jsonl"))
     
     if not json_files:
         print("No data files to clean")
@@ -185,7 +185,7 @@ def verify_data_files():
     
     data_dir = project_root / "data"
     required_files = [
-        "branch_history.json",
+        "branch_history.jsonl",
         "ci_pipeline_timeline.json",
         "deployment_history.json"
     ]
@@ -202,7 +202,10 @@ def verify_data_files():
         
         try:
             with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+                if filepath.suffix == ".jsonl":
+                    data = [json.loads(line) for line in f if line.strip()]
+                else:
+                    data = json.load(f)
             
             # Check if file has data
             if isinstance(data, list) and len(data) == 0:
@@ -240,9 +243,9 @@ def show_data_summary():
     
     # Branch history
     try:
-        branch_file = data_dir / "branch_history.json"
+        branch_file = data_dir / "branch_history.jsonl"
         with open(branch_file, 'r', encoding='utf-8') as f:
-            branches = json.load(f)
+            branches = [json.loads(line) for line in f if line.strip()]
         print(f"\nBranch History: {len(branches)} branches")
         for i, branch in enumerate(branches[:3], 1):
             print(f"  {i}. {branch['type']:8} - {branch['description']}")
@@ -4,28 +4,204 @@ Handles branch creation, naming, and management
 """
 
 import os
-from git import Repo, GitCommandError
+import functools
+from git import Repo, GitCommandError, GitError
 from datetime import datetime
 import logging
+from logging.handlers import RotatingFileHandler
 from pathlib import Path
 import json
+from concurrent.futures import ThreadPoolExecutor
 
-# Setup logging
-log_dir = Path(__file__).parent.parent / "logs"
-log_dir.mkdir(exist_ok=True)
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_dir / f"branch_manager_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"),
-        logging.StreamHandler()
-    ]
-)
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
 
+def _init_logging():
+    """Setup logging for script runs (importing the module creates no files)"""
+    log_dir = Path(__file__).parent.parent / "logs"
+    log_dir.mkdir(exist_ok=True)
+    
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            RotatingFileHandler(log_dir / "branch_manager.log", maxBytes=5_000_000, backupCount=5),
+            logging.StreamHandler()
+        ]
+    )
+
+
+def encode_history_line(entry):
+    """Encode one history entry as a compact UTF-8 JSON line"""
+    if orjson is not None:
+        return orjson.dumps(entry) + b'\n'
+    return (json.dumps(entry, separators=(',', ':'), ensure_ascii=False) + '\n').encode('utf-8')
+
+
+def decode_history_line(line):
+    """Decode one JSONL history line (bytes)"""
+    if orjson is not None:
+        return orjson.loads(line)
+    return json.loads(line)
+
+
+def _append_history(hf, data, label):
+    """Append encoded history lines to an open JSONL handle in one write"""
+    try:
+        # Serialize appends from parallel CI jobs sharing the file
+        if fcntl:
+            fcntl.flock(hf.fileno(), fcntl.LOCK_EX)
+        try:
+            hf.write(data)
+            hf.flush()
+        finally:
+            if fcntl:
+                fcntl.flock(hf.fileno(), fcntl.LOCK_UN)
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to save {label}: {e}")
+
+
+class JsonlHistory:
+    """
+    Append-only JSONL history file shared by BranchManager and GitAutomation
+    
+    Entries appended inside a `with history:` block are written together
+    when the outermost block exits. With background=True appends run on a
+    single writer thread, which keeps them ordered.
+    """
+    
+    def __init__(self, path, label="history", background=False):
+        self.path = Path(path)
+        self.label = label
+        self.background = background
+        
+        # Entries buffered while inside a `with` block
+        self._deferred = None
+        self._batch_depth = 0
+        
+        # Buffered append handle, opened on first write
+        self._hf = None
+        
+        self._io_pool = None
+        if background:
+            self._io_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-io")
+    
+    def __enter__(self):
+        """Defer writes until the outermost block exits"""
+        if self._batch_depth == 0:
+            self._deferred = []
+        self._batch_depth += 1
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Flush deferred entries in a single write"""
+        self._batch_depth -= 1
+        if self._batch_depth == 0:
+            deferred, self._deferred = self._deferred, None
+            if deferred:
+                self._submit(deferred)
+        return False
+    
+    def close(self):
+        """Wait for pending writes and close the file handle"""
+        self._shutdown(wait=True)
+    
+    def __del__(self):
+        # May run on any thread, including the writer itself: never join here
+        self._shutdown(wait=False)
+    
+    def _shutdown(self, wait):
+        """Stop the writer thread; the handle closes after the queued appends"""
+        io_pool, self._io_pool = getattr(self, '_io_pool', None), None
+        hf, self._hf = getattr(self, '_hf', None), None
+        if io_pool is not None:
+            if hf is not None:
+                try:
+                    io_pool.submit(hf.close)
+                    hf = None
+                except RuntimeError:  # interpreter shutting down
+                    pass
+            io_pool.shutdown(wait=wait)
+        if hf is not None and not hf.closed:
+            hf.close()
+    
+    def append(self, entry):
+        """Append one entry (deferred inside a `with` block)"""
+        if self._deferred is not None:
+            self._deferred.append(entry)
+            return
+        self._submit([entry])
+    
+    def _submit(self, entries):
+        """Encode entries and write them, on the writer thread if there is one"""
+        try:
+            data = b"".join(encode_history_line(entry) for entry in entries)
+            if self._hf is None:
+                self._hf = open(self.path, 'ab', buffering=64 * 1024)
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"Failed to save {self.label}: {e}")
+            return
+        # Queued jobs get only the handle and bytes, never self, so the last
+        # reference to this object is not dropped on the writer thread
+        if self._io_pool is None:
+            _append_history(self._hf, data, self.label)
+        else:
+            self._io_pool.submit(_append_history, self._hf, data, self.label)
+    
+    def wait(self):
+        """Block until every queued write has completed"""
+        if self._io_pool is not None:
+            self._io_pool.submit(lambda: None).result()
+    
+    def __iter__(self):
+        """Stream entries from the file"""
+        self.wait()
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                if line.strip():
+                    yield decode_history_line(line)
+    
+    def dump_pretty(self):
+        """Return the history as indented JSON (debugging only)"""
+        return json.dumps(list(self), indent=2, ensure_ascii=False)
+    
+    def rewrite(self, entries):
+        """Replace the file contents with entries"""
+        self.wait()
+        self.path.write_bytes(b"".join(encode_history_line(entry) for entry in entries))
+
+
+# Deletes every ASCII character that is not alphanumeric or underscore
+_NAME_DELETE_TABLE = str.maketrans("", "", "".join(
+    ch for ch in map(chr, range(128)) if not (ch.isalnum() or ch == "_")
+))
+
+
+@functools.lru_cache(maxsize=128)
+def _normalize_name_cached(value):
+    """Normalize a name to UPPERCASE with underscores only (memoized)"""
+    cleaned = value.strip().replace(" ", "_")
+    if cleaned.isascii():
+        cleaned = cleaned.translate(_NAME_DELETE_TABLE)
+    else:
+        cleaned = "".join(ch for ch in cleaned if ch.isalnum() or ch == "_")
+    return cleaned.upper()
+
+
 class BranchManager:
     """Manages Git branches with TEAM_NAME_LEADER_NAME_AI_Fix naming convention"""
     
@@ -33,18 +209,21 @@ class BranchManager:
     DEFAULT_TEAM_NAME = os.getenv("TEAM_NAME", "RAG_RAIDERS")
     DEFAULT_LEADER_NAME = os.getenv("LEADER_NAME", "DEO_PRAKASH")
     
-    def __init__(self, repo_path=None, team_name=None, leader_name=None):
+    def __init__(self, repo_path=None, team_name=None, leader_name=None, repo=None):
         """
         Initialize Branch Manager
         
         Args:
             repo_path (str): Path to Git repository
+            repo (Repo, optional): Already opened repository to share
         """
-        if repo_path:
+        if repo is not None:
+            self.repo = repo
+        elif repo_path:
             try:
                 self.repo = Repo(repo_path)
                 logger.info(f"Initialized repo at {repo_path}")
-            except Exception as e:
+            except (GitError, OSError) as e:
                 logger.error(f"Failed to initialize repository: {e}")
                 self.repo = None
         else:
@@ -57,21 +236,44 @@ class BranchManager:
         self.project_root = Path(__file__).parent.parent
         self.data_dir = self.project_root / "data"
         self.data_dir.mkdir(exist_ok=True)
-        self.history_file = self.data_dir / "branch_history.json"
+        self._history = JsonlHistory(self.data_dir / "branch_history.jsonl", label="branch history")
         
-        # Initialize file if doesn't exist
-        if not self.history_file.exists():
-            self.history_file.write_text("[]", encoding='utf-8')
+        # Initialize file if doesn't exist (append mode creates it without a separate stat)
+        open(self.history_file, 'a', encoding='utf-8').close()
         
         self.branch_history = []
+        
+        # Generated branch names keyed by (team, leader)
+        self._branch_name_cache = {}
+        
+    @property
+    def history_file(self):
+        """Path of the JSONL branch history"""
+        return self._history.path
+    
+    @history_file.setter
+    def history_file(self, path):
+        self._history.close()
+        self._history = JsonlHistory(path, label="branch history")
+    
+    def __enter__(self):
+        """Defer history writes until the outermost block exits"""
+        self._history.__enter__()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Flush deferred history entries in a single write"""
+        return self._history.__exit__(exc_type, exc_value, traceback)
+    
+    def close(self):
+        """Flush and close the history file handle"""
+        self._history.close()
     
     def _normalize_name(self, value):
         """Normalize names to UPPERCASE with underscores only"""
         if value is None:
             return ""
-        cleaned = value.strip().replace(" ", "_")
-        cleaned = "".join(ch for ch in cleaned if ch.isalnum() or ch == "_")
-        return cleaned.upper()
+        return _normalize_name_cached(value)
 
     def generate_branch_name(self, team_name=None, leader_name=None):
         """
@@ -84,13 +286,17 @@ class BranchManager:
         Returns:
             str: Formatted branch name
         """
-        team = self._normalize_name(team_name or self.team_name)
-        leader = self._normalize_name(leader_name or self.leader_name)
-        branch_name = f"{team}_{leader}_{self.BRANCH_SUFFIX}"
-        logger.info(f"Generated branch name: {branch_name}")
+        key = (team_name or self.team_name, leader_name or self.leader_name)
+        branch_name = self._branch_name_cache.get(key)
+        if branch_name is None:
+            team = self._normalize_name(key[0])
+            leader = self._normalize_name(key[1])
+            branch_name = f"{team}_{leader}_{self.BRANCH_SUFFIX}"
+            self._branch_name_cache[key] = branch_name
+            logger.info(f"Generated branch name: {branch_name}")
         return branch_name
     
-    def create_branch(self, branch_name, base_branch="main", checkout=True):
+    def create_branch(self, branch_name, base_branch="main", checkout=True, skip_pull=False):
         """
         Create a new branch
         
@@ -98,6 +304,7 @@ class BranchManager:
             branch_name (str): Name of the new branch
             base_branch (str): Base branch to create from
             checkout (bool): Whether to checkout the new branch
+            skip_pull (bool): Skip syncing the base branch with origin
             
         Returns:
             bool: Success status
@@ -112,11 +319,10 @@ class BranchManager:
             self.repo.git.checkout(base_branch)
             
             # Pull latest changes
-            if self.repo.remotes:
-                logger.info("Pulling latest changes...")
-                self.repo.remotes.origin.pull()
+            if "origin" in self.repo.remotes and not skip_pull:
+                self._sync_base_branch(base_branch)
             
-            existing = [branch.name for branch in self.repo.heads]
+            existing = set(self._local_branch_names())
             if branch_name in existing:
                 logger.info(f"Branch already exists: {branch_name}")
                 if checkout:
@@ -144,10 +350,27 @@ class BranchManager:
         except GitCommandError as e:
             logger.error(f"[FAIL] Git command failed: {e}")
             return False
-        except Exception as e:
+        except (GitError, OSError, IndexError, ValueError) as e:
+            # IndexError: base branch missing locally or on origin
+            # ValueError: invalid branch name rejected by create_head
             logger.error(f"[FAIL] Unexpected error: {e}")
             return False
     
+    def _sync_base_branch(self, base_branch):
+        """Fetch base branch and fast-forward only if origin is ahead"""
+        origin = self.repo.remotes.origin
+        logger.info(f"Fetching latest {base_branch}...")
+        origin.fetch(base_branch)
+        
+        local_commit = self.repo.heads[base_branch].commit
+        remote_commit = origin.refs[base_branch].commit
+        if local_commit == remote_commit:
+            logger.info(f"{base_branch} is up to date")
+            return
+        
+        logger.info(f"Fast-forwarding {base_branch}...")
+        self.repo.git.merge('--ff-only', f"{origin.name}/{base_branch}")
+    
     def create_ai_fix_branch(self, team_name=None, leader_name=None):
         """
         Create a branch using the TEAM_NAME_LEADER_NAME_AI_Fix naming convention
@@ -165,6 +388,10 @@ class BranchManager:
             return branch_name
         return None
     
+    def _local_branch_names(self):
+        """List local branch names with a single for-each-ref call"""
+        return self.repo.git.for_each_ref('--format=%(refname:lstrip=2)', 'refs/heads/').splitlines()
+    
     def list_branches(self, pattern=None):
         """
         List branches in the repository
@@ -180,17 +407,16 @@ class BranchManager:
             return []
         
         try:
-            branches = [branch.name for branch in self.repo.heads]
-            
-            if pattern:
-                branches = [b for b in branches if pattern in b]
-            
-            logger.info(f"Found {len(branches)} branches")
-            return branches
-            
-        except Exception as e:
+            branches = self._local_branch_names()
+        except GitCommandError as e:
             logger.error(f"Failed to list branches: {e}")
             return []
+        
+        if pattern:
+            branches = [b for b in branches if pattern in b]
+        
+        logger.info(f"Found {len(branches)} branches")
+        return branches
     
     def delete_branch(self, branch_name, force=False):
         """
@@ -211,7 +437,7 @@ class BranchManager:
             self.repo.delete_head(branch_name, force=force)
             logger.info(f"[OK] Deleted branch: {branch_name}")
             return True
-        except Exception as e:
+        except GitCommandError as e:
             logger.error(f"[FAIL] Failed to delete branch: {e}")
             return False
     
@@ -222,19 +448,21 @@ class BranchManager:
         
         try:
             return self.repo.active_branch.name
-        except Exception as e:
+        except (TypeError, ValueError) as e:
+            # TypeError: HEAD is detached
             logger.error(f"Failed to get current branch: {e}")
             return None
     
     def create_branch_entry(self, issue_type=None, issue_id=None, description=None, team_name=None, leader_name=None):
         """Create and save a branch entry"""
         branch_name = self.generate_branch_name(team_name=team_name, leader_name=leader_name)
-        run_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+        now = datetime.now()
+        run_id = now.strftime("%Y%m%d_%H%M%S")
         
         branch_entry = {
             "branch_name": branch_name,
             "type": issue_type or "N/A",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now.isoformat(),
             "issue_id": issue_id or "N/A",
             "description": description or "N/A",
             "run_id": run_id,
@@ -250,45 +478,45 @@ class BranchManager:
         return branch_entry
     
     def _save_to_file(self, branch_entry):
-        """Save branch entry to JSON file"""
-        try:
-            # Read existing history
-            existing_history = []
-            if self.history_file.exists():
-                content = self.history_file.read_text(encoding='utf-8')
-                if content.strip():
-                    existing_history = json.loads(content)
-            
-            # Append new entry
-            existing_history.append(branch_entry)
-            
-            # Write back
-            self.history_file.write_text(json.dumps(existing_history, indent=2), encoding='utf-8')
-            logger.info(f"Branch saved: {branch_entry['branch_name']}")
-            
-        except Exception as e:
-            logger.error(f"Failed to save branch history: {e}")
+        """Append branch entry to JSONL history file (deferred inside a `with` block)"""
+        self._history.append(branch_entry)
+        logger.info(f"Branch saved: {branch_entry['branch_name']}")
+    
+    def iter_history(self):
+        """
+        Stream branch entries from the JSONL history file
+        
+        Yields:
+            dict: Branch entry
+        """
+        return iter(self._history)
+    
+    def dump_pretty(self):
+        """Return the branch history as indented JSON (debugging only)"""
+        return self._history.dump_pretty()
     
     def save_branch_history(self):
-        """Save branch history to JSON file (for compatibility)"""
+        """Save branch history to JSONL file (for compatibility)"""
         try:
-            self.history_file.write_text(json.dumps(self.branch_history, indent=2), encoding='utf-8')
+            self._history.rewrite(self.branch_history)
             logger.info(f"Branch history saved to {self.history_file}")
-        except Exception as e:
+        except (OSError, TypeError, ValueError) as e:
             logger.error(f"Failed to save branch history: {e}")
 
 
 def main():
     """Main execution function"""
+    _init_logging()
     logger.info("=== Branch Manager - TEAM_NAME_LEADER_NAME_AI_Fix ===")
     
     # Example usage
     manager = BranchManager()
     
-    # Generate example branch name
-    logger.info("\n=== Example Branch Name ===")
-    branch_name = manager.generate_branch_name()
-    logger.info(f"  {branch_name}")
+    with manager:
+        # Generate example branch name
+        logger.info("\n=== Example Branch Name ===")
+        branch_name = manager.generate_branch_name()
+        logger.info(f"  {branch_name}")
     
     # Save history
     manager.save_branch_history()
@@ -5,27 +5,34 @@ Automated commit and push flow for CI/CD pipeline
 
 import os
 import sys
-from git import Repo, GitCommandError
+from git import Repo, Actor, GitCommandError, GitError
 from pathlib import Path
 import logging
+from logging.handlers import RotatingFileHandler
 from datetime import datetime
-import json
-from branch_manager import BranchManager
+import tempfile
+from branch_manager import BranchManager, JsonlHistory
 
-# Setup logging
-log_dir = Path(__file__).parent.parent / "logs"
-log_dir.mkdir(exist_ok=True)
+logger = logging.getLogger(__name__)
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_dir / f"git_automation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"),
-        logging.StreamHandler()
-    ]
-)
+# Marker prepended to every automated commit message
+_AI_TAG = "[AI-AGENT]"
+_AI_PREFIX = _AI_TAG + " "
 
-logger = logging.getLogger(__name__)
+
+def _init_logging():
+    """Setup logging for script runs (importing the module creates no files)"""
+    log_dir = Path(__file__).parent.parent / "logs"
+    log_dir.mkdir(exist_ok=True)
+    
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            RotatingFileHandler(log_dir / "git_automation.log", maxBytes=5_000_000, backupCount=5),
+            logging.StreamHandler()
+        ]
+    )
 
 
 class GitAutomation:
@@ -41,7 +48,7 @@ class GitAutomation:
         try:
             self.repo_path = Path(repo_path).resolve()
             self.repo = Repo(repo_path)
-            self.branch_manager = BranchManager(repo_path)
+            self.branch_manager = BranchManager(repo=self.repo)
             logger.info(f"Initialized Git automation for: {self.repo_path}")
 
             self.team_name = os.getenv("TEAM_NAME", "RIFT_ORGANISERS")
@@ -50,18 +57,51 @@ class GitAutomation:
             # Setup data directory
             self.data_dir = self.repo_path / "data"
             self.data_dir.mkdir(exist_ok=True)
-            self.history_file = self.data_dir / "git_automation_history.json"
+            self.history_file = self.data_dir / "git_automation_history.jsonl"
+            # Single writer thread keeps history appends ordered and off the git path
+            self._history = JsonlHistory(self.history_file, label="automation history", background=True)
             
-            # Initialize file if doesn't exist
-            if not self.history_file.exists():
-                self.history_file.write_text("[]", encoding='utf-8')
+            # Initialize file if doesn't exist (append mode creates it without a separate stat)
+            open(self.history_file, 'a', encoding='utf-8').close()
             
             self.automation_history = []
             
-        except Exception as e:
+            # Timestamp shared by records of the running automated_commit_push
+            self._run_timestamp = None
+            
+            # (team, leader) and the AI fix branch name generated for them
+            self._target_branch = None
+            
+            # Current branch name, reset whenever a checkout may have happened
+            self._active_branch_cache = None
+            
+        except (GitError, OSError) as e:
             logger.error(f"Failed to initialize repository: {e}")
             raise
     
+    def __enter__(self):
+        """Defer history writes until the outermost block exits"""
+        self._history.__enter__()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Flush deferred operations in a single write"""
+        return self._history.__exit__(exc_type, exc_value, traceback)
+    
+    def close(self):
+        """Wait for pending history writes and close the history file handle"""
+        self._history.close()
+    
+    def _timestamp(self):
+        """Return the running cycle's timestamp, or the current time"""
+        return self._run_timestamp or datetime.now().isoformat()
+    
+    def _active_branch(self):
+        """Return the current branch name for commit records, cached until the next checkout"""
+        if self._active_branch_cache is None:
+            self._active_branch_cache = self.repo.active_branch.name
+        return self._active_branch_cache
+    
     def check_status(self):
         """
         Check repository status
@@ -70,13 +110,10 @@ class GitAutomation:
             dict: Status information
         """
         try:
-            status = {
-                "branch": self.repo.active_branch.name,
-                "modified": [item.a_path for item in self.repo.index.diff(None)],
-                "untracked": self.repo.untracked_files,
-                "staged": [item.a_path for item in self.repo.index.diff("HEAD")],
-                "clean": not self.repo.is_dirty(untracked_files=True)
-            }
+            # One porcelain call instead of separate index/worktree/untracked scans
+            output = self.repo.git.status('--porcelain=v2', '-z', '--branch', '--untracked-files=all')
+            status = self._parse_status(output)
+            self._active_branch_cache = status["branch"]
             
             logger.info(f"Repository status: {status['branch']}")
             logger.info(f"  Modified: {len(status['modified'])}")
@@ -86,25 +123,80 @@ class GitAutomation:
             
             return status
             
-        except Exception as e:
+        except GitCommandError as e:
             logger.error(f"Failed to check status: {e}")
             return None
     
-    def add_files(self, files=None, add_all=False):
+    def _parse_status(self, output):
+        """
+        Parse `git status --porcelain=v2 -z --branch` output
+        
+        Args:
+            output (str): NUL-separated porcelain v2 records
+            
+        Returns:
+            dict: Status information
+        """
+        status = {
+            "branch": None,
+            "modified": [],
+            "untracked": [],
+            "staged": [],
+            "clean": True
+        }
+        records = iter(output.split('\0'))
+        for record in records:
+            if not record:
+                continue
+            kind = record[0]
+            if kind == '#':
+                if record.startswith('# branch.head '):
+                    head = record[len('# branch.head '):]
+                    status["branch"] = None if head == "(detached)" else head
+                continue
+            
+            status["clean"] = False
+            if kind == '?':
+                status["untracked"].append(record[2:])
+            elif kind in '12u':
+                # Ordinary, renamed/copied and unmerged entries differ only in field count
+                parts = record.split(' ', {'1': 8, '2': 9, 'u': 10}[kind])
+                xy, path = parts[1], parts[-1]
+                if kind == '2':
+                    next(records, None)  # original path of a rename/copy
+                if xy[0] != '.':
+                    status["staged"].append(path)
+                if xy[1] != '.':
+                    status["modified"].append(path)
+        return status
+    
+    def add_files(self, files=None, add_all=False, status=None, full_scan=False):
         """
         Stage files for commit
         
         Args:
             files (list, optional): List of files to add
             add_all (bool): Add all changes
+            status (dict, optional): Result of check_status() to stage from;
+                without it add_all runs a single `git add -A`
+            full_scan (bool): Use `git add -A` even when status is given
             
         Returns:
             bool: Success status
         """
         try:
             if add_all:
-                logger.info("Staging all changes...")
-                self.repo.git.add(A=True)
+                if full_scan or status is None:
+                    logger.info("Staging all changes...")
+                    self.repo.git.add(A=True)
+                else:
+                    # Only the paths git status reported; `git add` also stages deletions
+                    paths = status['modified'] + status['untracked']
+                    if paths:
+                        logger.info(f"Staging {len(paths)} changed files...")
+                        self._add_literal_paths(paths)
+                    else:
+                        logger.info("No unstaged changes")
             elif files:
                 logger.info(f"Staging {len(files)} files...")
                 self.repo.index.add(files)
@@ -115,11 +207,26 @@ class GitAutomation:
             logger.info("[OK] Files staged successfully")
             return True
             
-        except Exception as e:
+        except (GitCommandError, OSError) as e:
             logger.error(f"[FAIL] Failed to stage files: {e}")
             return False
     
-    def commit(self, message, author_name=None, author_email=None):
+    def _add_literal_paths(self, paths):
+        """
+        Stage exactly these paths with one `git add`
+        
+        The list goes through stdin as NUL-separated literal pathspecs, so
+        it is not bound by the command-line length limit and names with
+        `*`, `[` or a leading `:` only ever match themselves.
+        """
+        with tempfile.TemporaryFile() as pathspec:
+            pathspec.write(b'\0'.join(os.fsencode(path) for path in paths))
+            pathspec.seek(0)
+            self.repo.git(literal_pathspecs=True).add(
+                '--pathspec-from-file=-', '--pathspec-file-nul', istream=pathspec
+            )
+    
+    def commit(self, message, author_name=None, author_email=None, precomputed_status=None):
         """
         Commit staged changes
         
@@ -127,26 +234,33 @@ class GitAutomation:
             message (str): Commit message
             author_name (str, optional): Author name
             author_email (str, optional): Author email
+            precomputed_status (dict, optional): check_status() result of the tree
+                being committed; skips the is_dirty() index scan
             
         Returns:
             str: Commit hash if successful, None otherwise
         """
         try:
             # Check if there are changes to commit
-            if not self.repo.is_dirty():
+            if precomputed_status is not None:
+                has_changes = not precomputed_status['clean']
+            else:
+                has_changes = self.repo.is_dirty()
+            if not has_changes:
                 logger.warning("No changes to commit")
                 return None
             
-            if not message.startswith("[AI-AGENT]"):
-                message = f"[AI-AGENT] {message}"
+            if not message.startswith(_AI_TAG):
+                message = _AI_PREFIX + message
 
-            logger.info(f"Committing changes: {message[:50]}...")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(f"Committing changes: {message[:50]}...")
             
             # Set author if provided
             if author_name and author_email:
                 commit = self.repo.index.commit(
                     message,
-                    author=f"{author_name} <{author_email}>"
+                    author=Actor(author_name, author_email)
                 )
             else:
                 commit = self.repo.index.commit(message)
@@ -156,18 +270,19 @@ class GitAutomation:
             
             # Record commit
             commit_record = {
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": self._timestamp(),
                 "action": "commit",
                 "commit_hash": commit_hash,
                 "message": message,
-                "branch": self.repo.active_branch.name
+                "branch": self._active_branch()
             }
             self.automation_history.append(commit_record)
             self._save_operation(commit_record)
             
             return commit_hash
             
-        except Exception as e:
+        except (GitError, OSError, TypeError) as e:
+            # TypeError: HEAD is detached
             logger.error(f"[FAIL] Commit failed: {e}")
             return None
     
@@ -185,6 +300,7 @@ class GitAutomation:
         """
         try:
             if branch is None:
+                # Read HEAD itself: a stale name would push the wrong branch
                 branch = self.repo.active_branch.name
             
             if branch in ["main", "master"]:
@@ -203,7 +319,7 @@ class GitAutomation:
             
             # Record push
             push_record = {
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": self._timestamp(),
                 "action": "push",
                 "remote": remote,
                 "branch": branch,
@@ -218,31 +334,41 @@ class GitAutomation:
         except GitCommandError as e:
             logger.error(f"[FAIL] Push failed: {e}")
             return False
-        except Exception as e:
+        except (GitError, OSError, IndexError, TypeError) as e:
+            # IndexError: unknown remote, TypeError: HEAD is detached
             logger.error(f"[FAIL] Unexpected error during push: {e}")
             return False
 
     def ensure_ai_fix_branch(self, team_name=None, leader_name=None, base_branch=None):
         """Ensure we are on TEAM_NAME_LEADER_NAME_AI_Fix branch"""
-        if base_branch is None:
-            base_branch = os.getenv("DEFAULT_BRANCH", "main")
         team_name = team_name or self.team_name
         leader_name = leader_name or self.leader_name
 
-        target_branch = self.branch_manager.generate_branch_name(
-            team_name=team_name,
-            leader_name=leader_name
-        )
+        # Target name only changes with team/leader, so keep it for the object's lifetime
+        key = (team_name, leader_name)
+        if self._target_branch is None or self._target_branch[0] != key:
+            target = self.branch_manager.generate_branch_name(
+                team_name=team_name,
+                leader_name=leader_name
+            )
+            self._target_branch = (key, target)
+        target_branch = self._target_branch[1]
 
+        # Always read HEAD here: the branch may have been switched outside this object
         current_branch = self.repo.active_branch.name
+        self._active_branch_cache = current_branch
         if current_branch == target_branch:
             return target_branch
 
+        if base_branch is None:
+            base_branch = os.getenv("DEFAULT_BRANCH", "main")
+
         created = self.branch_manager.create_branch(
             target_branch,
             base_branch=base_branch,
             checkout=True
         )
+        self._active_branch_cache = None
 
         if not created:
             raise RuntimeError("Failed to create or checkout AI fix branch")
@@ -270,36 +396,44 @@ class GitAutomation:
             "timestamp": datetime.now().isoformat()
         }
         
-        # Step 0: Ensure AI fix branch
+        # Records written during this cycle share its timestamp
+        self._run_timestamp = results["timestamp"]
+        self._active_branch_cache = None
         try:
-            self.ensure_ai_fix_branch()
-        except Exception as e:
-            logger.error(f"[FAIL] {e}")
-            return results
+            with self:
+                # Step 0: Ensure AI fix branch
+                try:
+                    self.ensure_ai_fix_branch()
+                except (RuntimeError, GitError, TypeError) as e:
+                    logger.error(f"[FAIL] {e}")
+                    return results
 
-        # Step 1: Add files
-        if self.add_files(add_all=add_all):
-            results["add"] = True
-        else:
-            logger.error("Failed to add files, aborting...")
-            return results
+                # Step 1: Add files
+                status = self.check_status() if add_all else None
+                if self.add_files(add_all=add_all, status=status):
+                    results["add"] = True
+                else:
+                    logger.error("Failed to add files, aborting...")
+                    return results
         
-        # Step 2: Commit
-        commit_hash = self.commit(message)
-        if commit_hash:
-            results["commit"] = commit_hash
-        else:
-            logger.error("Failed to commit, aborting...")
-            return results
+                # Step 2: Commit
+                commit_hash = self.commit(message, precomputed_status=status)
+                if commit_hash:
+                    results["commit"] = commit_hash
+                else:
+                    logger.error("Failed to commit, aborting...")
+                    return results
         
-        # Step 3: Push
-        if self.push(remote=remote):
-            results["push"] = True
-        else:
-            logger.error("Failed to push")
+                # Step 3: Push
+                if self.push(remote=remote):
+                    results["push"] = True
+                else:
+                    logger.error("Failed to push")
         
-        logger.info("=== Automation Complete ===")
-        return results
+                logger.info("=== Automation Complete ===")
+                return results
+        finally:
+            self._run_timestamp = None
     
     def pull(self, remote="origin", branch=None):
         """
@@ -314,6 +448,7 @@ class GitAutomation:
         """
         try:
             if branch is None:
+                # Read HEAD itself: a stale name would merge the wrong branch
                 branch = self.repo.active_branch.name
             
             logger.info(f"Pulling from {remote}/{branch}...")
@@ -321,7 +456,8 @@ class GitAutomation:
             logger.info("[OK] Pull successful")
             return True
             
-        except Exception as e:
+        except (GitError, OSError, IndexError, TypeError) as e:
+            # IndexError: unknown remote, TypeError: HEAD is detached
             logger.error(f"[FAIL] Pull failed: {e}")
             return False
     
@@ -345,6 +481,7 @@ class GitAutomation:
             team_name=team_name,
             leader_name=leader_name
         )
+        self._active_branch_cache = None
         
         if not branch_name:
             logger.error("Failed to create branch")
@@ -357,59 +494,60 @@ class GitAutomation:
         return results
     
     def _save_operation(self, operation):
-        """Save operation to history file immediately"""
-        try:
-            # Read existing history
-            existing_history = []
-            if self.history_file.exists():
-                content = self.history_file.read_text(encoding='utf-8')
-                if content.strip():
-                    existing_history = json.loads(content)
-            
-            # Append new operation
-            existing_history.append(operation)
-            
-            # Write back
-            self.history_file.write_text(json.dumps(existing_history, indent=2), encoding='utf-8')
-            
-        except Exception as e:
-            logger.error(f"Failed to save automation history: {e}")
+        """Append operation to JSONL history file (deferred inside a `with` block)"""
+        self._history.append(operation)
+    
+    def iter_history(self):
+        """
+        Stream operations from the JSONL history file
+        
+        Yields:
+            dict: Recorded operation
+        """
+        return iter(self._history)
+    
+    def dump_pretty(self):
+        """Return the automation history as indented JSON (debugging only)"""
+        return self._history.dump_pretty()
     
     def save_automation_history(self):
-        """Save automation history to JSON file"""
+        """Save automation history to JSONL file"""
         try:
-            self.history_file.write_text(json.dumps(self.automation_history, indent=2), encoding='utf-8')
+            self._history.rewrite(self.automation_history)
             logger.info(f"Automation history saved to {self.history_file}")
-        except Exception as e:
+        except (OSError, TypeError, ValueError) as e:
             logger.error(f"Failed to save automation history: {e}")
 
 
 def main():
     """Main execution function"""
+    _init_logging()
     logger.info("=== Git Automation System ===")
     
+    git_auto = None
     try:
         # Initialize automation
         git_auto = GitAutomation()
         
-        # Check status
-        status = git_auto.check_status()
+        with git_auto:
+            # Check status
+            status = git_auto.check_status()
         
-        if status and not status['clean']:
-            logger.info("\nRepository has changes. Running automated workflow...")
+            if status and not status['clean']:
+                logger.info("\nRepository has changes. Running automated workflow...")
             
-            # Example: Automated commit and push
-            results = git_auto.automated_commit_push(
-                message="[AI] Automated commit via GitPython automation",
-                add_all=True
-            )
+                # Example: Automated commit and push
+                results = git_auto.automated_commit_push(
+                    message="[AI] Automated commit via GitPython automation",
+                    add_all=True
+                )
             
-            logger.info("\n=== Results ===")
-            logger.info(f"  Add: {'[OK]' if results['add'] else '[FAIL]'}")
-            logger.info(f"  Commit: {results['commit'] or '[FAIL]'}")
-            logger.info(f"  Push: {'[OK]' if results['push'] else '[FAIL]'}")
-        else:
-            logger.info("Repository is clean, no changes to commit")
+                logger.info("\n=== Results ===")
+                logger.info(f"  Add: {'[OK]' if results['add'] else '[FAIL]'}")
+                logger.info(f"  Commit: {results['commit'] or '[FAIL]'}")
+                logger.info(f"  Push: {'[OK]' if results['push'] else '[FAIL]'}")
+            else:
+                logger.info("Repository is clean, no changes to commit")
         
         # Save history
         git_auto.save_automation_history()
@@ -417,6 +555,9 @@ def main():
     except Exception as e:
         logger.error(f"Automation failed: {e}")
         sys.exit(1)
+    finally:
+        if git_auto is not None:
+            git_auto.close()
 
 
 if __name__ == "__main__":
@@ -6,127 +6,430 @@ Automates the cloning of repositories for CI/CD pipeline
 import os
 import sys
 import argparse
-from git import Repo, GitCommandError
 from pathlib import Path
 import logging
+from logging.handlers import RotatingFileHandler
 from datetime import datetime
 import json
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+from dataclasses import dataclass, asdict
+from concurrent.futures import ThreadPoolExecutor
 
-# Setup logging
-log_dir = Path(__file__).parent.parent / "logs"
-log_dir.mkdir(exist_ok=True)
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_dir / f"repo_clone_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"),
-        logging.StreamHandler()
-    ]
-)
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
 
+def _init_logging():
+    """Setup logging for script runs (importing the module creates no files)"""
+    log_dir = Path(__file__).parent.parent / "logs"
+    log_dir.mkdir(exist_ok=True)
+    
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            RotatingFileHandler(log_dir / "repo_clone.log", maxBytes=5_000_000, backupCount=5),
+            logging.StreamHandler()
+        ]
+    )
+
+
+# __slots__ via dataclass needs Python 3.10+; the Docker image still runs 3.9
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_SLOTS)
+class CloneRecord:
+    """One clone attempt in RepoCloner.clone_history"""
+    timestamp_ns: int
+    repo_url: str
+    repo_name: str = ""
+    branch: str = "default"
+    status: str = "success"
+    path: str = ""
+    error: str = ""
+
+
 class RepoCloner:
     """Handles repository cloning operations"""
     
-    def __init__(self, base_dir="./repos"):
+    def __init__(self, base_dir="./repos", cache_dir=None, backend="gitpython"):
         self.base_dir = Path(base_dir)
+        # "pygit2" clones in-process through libgit2 instead of spawning git
+        if backend == "pygit2":
+            try:
+                import pygit2
+            except ImportError:
+                logger.warning("pygit2 not available, falling back to GitPython")
+                backend = "gitpython"
+            else:
+                # clone_repository() only accepts depth= from pygit2 1.15 on
+                version = tuple(int(part) for part in pygit2.__version__.split(".")[:2])
+                if version < (1, 15):
+                    logger.warning(f"pygit2 {pygit2.__version__} is older than 1.15, "
+                                   "falling back to GitPython")
+                    backend = "gitpython"
+        self.backend = backend
         self.base_dir.mkdir(exist_ok=True)
+        # Persistent bare mirrors used as `--reference` for fresh clones
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.clone_history = []
+        self._history_lock = threading.Lock()
+        # Background deletes of replaced clone directories, joined in close()
+        self._cleanup_threads = []
+        # Share one SSH connection per host across clones via ControlMaster,
+        # unless the caller already configured their own ssh command
+        self._ssh_ctl_dir = None
+        self._git_env = {}
+        if not self._custom_ssh_configured():
+            self._ssh_ctl_dir = tempfile.mkdtemp(prefix="repo_clone_ssh_")
+            self._git_env["GIT_SSH_COMMAND"] = (
+                "ssh -o ControlMaster=auto -o ControlPersist=60s "
+                f"-o ControlPath={self._ssh_ctl_dir}/cm-%C"
+            )
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+    
+    def close(self):
+        """Wait for background deletes, stop SSH masters and remove their sockets"""
+        threads, self._cleanup_threads = getattr(self, '_cleanup_threads', []), []
+        for thread in threads:
+            thread.join()
+        ctl_dir, self._ssh_ctl_dir = getattr(self, '_ssh_ctl_dir', None), None
+        if ctl_dir:
+            for socket_path in Path(ctl_dir).glob("cm-*"):
+                try:
+                    # The host argument is required but unused with an explicit ControlPath
+                    subprocess.run(["ssh", "-O", "exit", "-o", f"ControlPath={socket_path}", "localhost"],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=10)
+                except (OSError, subprocess.SubprocessError) as e:
+                    logger.warning(f"Could not stop SSH master {socket_path}: {e}")
+            shutil.rmtree(ctl_dir, ignore_errors=True)
+    
+    def __del__(self):
+        self.close()
+    
+    @staticmethod
+    def _custom_ssh_configured():
+        """True if GIT_SSH, GIT_SSH_COMMAND or core.sshCommand picks the ssh command"""
+        if os.environ.get("GIT_SSH") or os.environ.get("GIT_SSH_COMMAND"):
+            return True
+        try:
+            result = subprocess.run(["git", "config", "--get", "core.sshCommand"],
+                                    capture_output=True, text=True)
+        except OSError:
+            return False
+        return bool(result.stdout.strip())
         
-    def clone_repository(self, repo_url, branch=None, depth=None):
+    def clone_repository(self, repo_url, branch=None, depth=1, single_branch=True,
+                         no_tags=True, blobless=False, skip_exist_check=False,
+                         recurse_submodules=False, jobs=None):
         """
         Clone a repository with specified options
         
+        Defaults to a shallow, tag-less clone, which is all a one-off CI build
+        needs and transfers a fraction of the full history. Pass depth=None
+        (or 0) when the build needs history, e.g. `git describe` or diffs
+        against older commits. blobless=True keeps full commit history but
+        fetches file contents lazily (`--filter=blob:none`); later checkouts
+        of other commits then need network access. recurse_submodules=True
+        also clones submodules, fetching up to `jobs` (default 8) of them in
+        parallel.
+        
         Args:
             repo_url (str): Git repository URL
             branch (str, optional): Specific branch to clone
-            depth (int, optional): Clone depth for shallow cloning
+            depth (int, optional): Clone depth for shallow cloning (None for full history)
+            single_branch (bool): Only fetch the requested branch
+            no_tags (bool): Skip fetching tags
+            blobless (bool): Partial clone without file contents
+            skip_exist_check (bool): Destination is known to be free; clone
+                without looking for an existing checkout
+            recurse_submodules (bool): Clone submodules as well
+            jobs (int, optional): Parallel submodule fetches
             
         Returns:
             Repo: GitPython Repo object
         """
+        from git import Repo, GitCommandError
+        
+        submodule_jobs = (jobs or 8) if recurse_submodules else None
+        
+        repo_name = self._repo_name(repo_url)
+        
         try:
-            repo_name = repo_url.split('/')[-1].replace('.git', '')
             clone_path = self.base_dir / repo_name
             
-            # Remove existing directory if it exists
-            if clone_path.exists():
-                logger.warning(f"Repository {repo_name} already exists. Removing...")
-                import shutil
-                shutil.rmtree(clone_path)
+            # Refresh an existing checkout of the same remote instead of recloning
+            repo = None
+            if not skip_exist_check:
+                repo = self._update_existing(clone_path, repo_url, branch, depth, submodule_jobs)
+            if repo is None:
+                if not skip_exist_check:
+                    # Move any existing directory aside and delete it in the
+                    # background while the clone downloads
+                    stale_path = clone_path.with_name(f"{repo_name}.old-{uuid.uuid4().hex}")
+                    try:
+                        clone_path.rename(stale_path)
+                    except FileNotFoundError:
+                        pass
+                    else:
+                        logger.warning(f"Repository {repo_name} already exists. Removing...")
+                        cleanup = threading.Thread(target=shutil.rmtree, args=(stale_path,),
+                                                   kwargs={'ignore_errors': True})
+                        cleanup.start()
+                        self._cleanup_threads.append(cleanup)
             
-            logger.info(f"Cloning repository: {repo_url}")
-            logger.info(f"Destination: {clone_path}")
+                logger.info(f"Cloning repository: {repo_url}")
+                logger.info(f"Destination: {clone_path}")
             
-            # Clone options
-            clone_kwargs = {}
-            if branch:
-                clone_kwargs['branch'] = branch
-                logger.info(f"Cloning branch: {branch}")
-            if depth:
-                clone_kwargs['depth'] = depth
-                logger.info(f"Shallow clone with depth: {depth}")
+                # Clone options
+                clone_kwargs = {}
+                if branch:
+                    clone_kwargs['branch'] = branch
+                    logger.info(f"Cloning branch: {branch}")
+                    if single_branch:
+                        clone_kwargs['single_branch'] = True
+                if depth:
+                    clone_kwargs['depth'] = depth
+                    logger.info(f"Shallow clone with depth: {depth}")
+                if no_tags:
+                    clone_kwargs['no_tags'] = True
+                multi_options = []
+                if blobless:
+                    multi_options.append("--filter=blob:none")
+                    logger.info("Partial clone without blobs")
+                if self.cache_dir:
+                    mirror_path = self._reference_mirror(repo_url, repo_name)
+                    if mirror_path:
+                        multi_options += ["--reference", str(mirror_path), "--dissociate"]
+                        logger.info(f"Using local mirror: {mirror_path}")
+                if submodule_jobs:
+                    multi_options += ["--recurse-submodules", f"--jobs={submodule_jobs}"]
+                    logger.info(f"Cloning submodules with {submodule_jobs} jobs")
             
-            # Perform clone
-            repo = Repo.clone_from(repo_url, clone_path, **clone_kwargs)
+                # Perform clone (libgit2 has no partial clone, --reference or
+                # parallel submodule support)
+                if self.backend == "pygit2" and not multi_options:
+                    repo = self._clone_pygit2(repo_url, clone_path, branch, depth,
+                                              single_branch=single_branch, no_tags=no_tags)
+                else:
+                    repo = Repo.clone_from(repo_url, clone_path, env=self._git_env,
+                                           multi_options=multi_options or None, **clone_kwargs)
+                if submodule_jobs:
+                    # GitPython rejects `-c` clone options, so persist it afterwards
+                    # for later `git fetch --recurse-submodules` runs
+                    with repo.config_writer() as config:
+                        config.set_value("submodule", "fetchJobs", submodule_jobs)
             
             # Record clone operation
-            clone_record = {
-                "timestamp": datetime.now().isoformat(),
-                "repo_url": repo_url,
-                "repo_name": repo_name,
-                "branch": branch or "default",
-                "status": "success",
-                "path": str(clone_path)
-            }
-            self.clone_history.append(clone_record)
+            clone_record = CloneRecord(
+                timestamp_ns=time.time_ns(),
+                repo_url=repo_url,
+                repo_name=repo_name,
+                branch=branch or "default",
+                path=str(clone_path)
+            )
+            with self._history_lock:
+                self.clone_history.append(clone_record)
             
             logger.info(f"[OK] Successfully cloned {repo_name}")
             return repo
             
         except GitCommandError as e:
             logger.error(f"[FAIL] Git command failed: {e}")
-            clone_record = {
-                "timestamp": datetime.now().isoformat(),
-                "repo_url": repo_url,
-                "status": "failed",
-                "error": str(e)
-            }
-            self.clone_history.append(clone_record)
+            clone_record = CloneRecord(
+                timestamp_ns=time.time_ns(),
+                repo_url=repo_url,
+                repo_name=repo_name,
+                branch=branch or "default",
+                status="failed",
+                error=str(e)
+            )
+            with self._history_lock:
+                self.clone_history.append(clone_record)
             raise
             
         except Exception as e:
             logger.error(f"[FAIL] Unexpected error during cloning: {e}")
             raise
     
-    def clone_multiple(self, repo_list):
+    @staticmethod
+    def _repo_name(repo_url):
+        """Directory name a clone of repo_url goes into"""
+        return repo_url.rsplit('/', 1)[-1].removesuffix('.git')
+    
+    def _env_for(self, repo):
+        """Git environment for an existing repository, honouring its own core.sshCommand"""
+        if self._git_env and repo.config_reader("repository").has_option("core", "sshCommand"):
+            return {}
+        return self._git_env
+    
+    def _clone_pygit2(self, repo_url, clone_path, branch, depth, single_branch=True, no_tags=True):
+        """
+        Clone in-process with libgit2 and open the result with GitPython
+        
+        Requires pygit2 >= 1.15. SSH URLs authenticate through ssh-agent.
+        libgit2 always downloads tags while cloning, so no_tags removes them
+        afterwards and sets remote.origin.tagOpt for later fetches.
+        """
+        import pygit2
+        from git import Repo, GitCommandError
+        
+        def single_branch_remote(repository, name, url):
+            name = name.decode() if isinstance(name, bytes) else name
+            repository.remotes.create(name, url, f"+refs/heads/{branch}:refs/remotes/{name}/{branch}")
+            return repository.remotes[name]
+        
+        callbacks = None
+        ssh_user = self._ssh_user(repo_url)
+        if ssh_user:
+            callbacks = pygit2.RemoteCallbacks(credentials=pygit2.KeypairFromAgent(ssh_user))
+        try:
+            cloned = pygit2.clone_repository(
+                repo_url, str(clone_path), checkout_branch=branch, depth=depth or 0,
+                callbacks=callbacks,
+                remote=single_branch_remote if branch and single_branch else None
+            )
+        except (pygit2.GitError, TypeError, ValueError) as e:
+            # Surface libgit2 and argument errors like a failed `git clone`
+            raise GitCommandError(["pygit2.clone_repository", repo_url], 128, str(e)) from e
+        if no_tags:
+            for ref in list(cloned.references):
+                if ref.startswith("refs/tags/"):
+                    cloned.references.delete(ref)
+            cloned.config["remote.origin.tagOpt"] = "--no-tags"
+        return Repo(clone_path)
+    
+    @staticmethod
+    def _ssh_user(repo_url):
+        """User name for an SSH repo_url (default "git"), or None for other transports"""
+        if "://" in repo_url:
+            parsed = urlparse(repo_url)
+            if parsed.scheme not in ("ssh", "git+ssh", "ssh+git"):
+                return None
+            return parsed.username or "git"
+        # scp-like syntax: [user@]host:path
+        host, sep, _ = repo_url.partition(":")
+        if not sep or "/" in host:
+            return None
+        return host.rpartition("@")[0] or "git"
+    
+    def _update_existing(self, clone_path, repo_url, branch, depth, submodule_jobs=None):
         """
-        Clone multiple repositories
+        Fetch into an existing checkout of repo_url and reset it
+        
+        Returns:
+            Repo: Updated repository, or None when a fresh clone is needed
+        """
+        from git import Repo, GitCommandError, InvalidGitRepositoryError, NoSuchPathError
+        
+        try:
+            repo = Repo(clone_path)
+        except (InvalidGitRepositoryError, NoSuchPathError):
+            return None
+        
+        if "origin" not in repo.remotes or repo.remotes.origin.url != repo_url:
+            return None
+        
+        try:
+            logger.info(f"Updating existing checkout: {clone_path}")
+            repo.git.update_environment(**self._env_for(repo))
+            fetch_args = ['origin', branch or 'HEAD']
+            if depth:
+                fetch_args.append(f'--depth={depth}')
+            elif os.path.exists(os.path.join(repo.git_dir, 'shallow')):
+                # Full history requested for a checkout that was cloned shallow
+                fetch_args.append('--unshallow')
+            repo.git.fetch(*fetch_args)
+            if branch:
+                repo.git.checkout('-f', '-B', branch, 'FETCH_HEAD')
+            else:
+                repo.git.reset('--hard', 'FETCH_HEAD')
+            repo.git.clean('-ffdx')
+            if submodule_jobs:
+                repo.git.submodule('update', '--init', '--recursive', f'--jobs={submodule_jobs}')
+            return repo
+        except GitCommandError as e:
+            logger.warning(f"Could not update existing checkout, recloning: {e}")
+            return None
+    
+    def _reference_mirror(self, repo_url, repo_name):
+        """Create or refresh the bare mirror of repo_url in cache_dir"""
+        from git import Repo, GitCommandError
+        
+        mirror_path = self.cache_dir / f"{repo_name}.git"
+        try:
+            if mirror_path.exists():
+                mirror = Repo(mirror_path)
+                mirror.git.update_environment(**self._env_for(mirror))
+                mirror.git.remote('update', '--prune')
+            else:
+                Repo.clone_from(repo_url, mirror_path, env=self._git_env, mirror=True)
+            return mirror_path
+        except GitCommandError as e:
+            logger.warning(f"Mirror unavailable, cloning without it: {e}")
+            return None
+    
+    def clone_multiple(self, repo_list, max_workers=4, skip_exist_check=False):
+        """
+        Clone multiple repositories concurrently
         
         Args:
             repo_list (list): List of dicts with repo_url, branch, depth
+            max_workers (int): Maximum number of clones running at once
+            skip_exist_check (bool): Destinations are known to be free
         """
-        results = []
-        for repo_config in repo_list:
-            try:
-                repo = self.clone_repository(
-                    repo_config.get('url'),
-                    branch=repo_config.get('branch'),
-                    depth=repo_config.get('depth')
-                )
-                results.append({
-                    "repo": repo_config.get('url'),
-                    "status": "success"
-                })
-            except Exception as e:
-                results.append({
-                    "repo": repo_config.get('url'),
-                    "status": "failed",
-                    "error": str(e)
-                })
+        # One slot per input, so results keep the order of repo_list
+        results = [None] * len(repo_list)
+        
+        # URLs with the same basename share a clone directory; clone those one
+        # after another (the last one wins) instead of racing on the path
+        groups = {}
+        for idx, repo_config in enumerate(repo_list):
+            groups.setdefault(self._repo_name(repo_config.get('url') or ''), []).append(idx)
+        
+        def clone_group(indices):
+            for idx in indices:
+                repo_config = repo_list[idx]
+                try:
+                    self.clone_repository(
+                        repo_config.get('url'),
+                        branch=repo_config.get('branch'),
+                        depth=repo_config.get('depth', 1),
+                        skip_exist_check=skip_exist_check
+                    )
+                    results[idx] = {
+                        "repo": repo_config.get('url'),
+                        "status": "success"
+                    }
+                except Exception as e:
+                    results[idx] = {
+                        "repo": repo_config.get('url'),
+                        "status": "failed",
+                        "error": str(e)
+                    }
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for future in [executor.submit(clone_group, indices) for indices in groups.values()]:
+                future.result()
         
         return results
     
@@ -136,24 +439,45 @@ class RepoCloner:
         data_dir.mkdir(exist_ok=True)
         
         history_file = data_dir / "clone_history.json"
-        with open(history_file, 'w') as f:
-            json.dump(self.clone_history, f, indent=2)
+        # Records keep raw ns timestamps; format them only when persisting
+        records = []
+        for record in self.clone_history:
+            record = asdict(record)
+            ts_ns = record.pop("timestamp_ns")
+            # Success records carry no error and failures no path, as before
+            for key in ("path", "error"):
+                if not record[key]:
+                    del record[key]
+            records.append({"timestamp": datetime.fromtimestamp(ts_ns / 1e9).isoformat(), **record})
+        if orjson is not None:
+            payload = orjson.dumps(records)
+        else:
+            payload = json.dumps(records, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        history_file.write_bytes(payload)
         
         logger.info(f"Clone history saved to {history_file}")
         
-    def get_repo_info(self, repo_path):
-        """Get information about a cloned repository"""
+    def get_repo_info(self, repo_path, detailed=False):
+        """
+        Get information about a cloned repository
+        
+        The commit hash comes from the resolved ref alone; detailed=True also
+        reads the commit object for its message, author and date.
+        """
+        from git import Repo
+        
         try:
             repo = Repo(repo_path)
+            commit = repo.head.commit
+            last_commit = {"hash": commit.hexsha[:7]}
+            if detailed:
+                last_commit["message"] = commit.message.strip()
+                last_commit["author"] = str(commit.author)
+                last_commit["date"] = commit.committed_datetime.isoformat()
             return {
                 "active_branch": repo.active_branch.name,
                 "remote_url": repo.remotes.origin.url if repo.remotes else None,
-                "last_commit": {
-                    "hash": repo.head.commit.hexsha[:7],
-                    "message": repo.head.commit.message.strip(),
-                    "author": str(repo.head.commit.author),
-                    "date": repo.head.commit.committed_datetime.isoformat()
-                }
+                "last_commit": last_commit
             }
         except Exception as e:
             logger.error(f"Failed to get repo info: {e}")
@@ -165,10 +489,16 @@ def main():
     parser = argparse.ArgumentParser(description="Clone a GitHub repository")
     parser.add_argument("--url", help="GitHub repository URL")
     parser.add_argument("--branch", help="Branch to clone", default=None)
-    parser.add_argument("--depth", help="Shallow clone depth", type=int, default=None)
+    parser.add_argument("--depth", help="Shallow clone depth (0 for full history)", type=int, default=1)
+    parser.add_argument("--blobless", help="Partial clone that fetches file contents lazily", action="store_true")
     parser.add_argument("--base-dir", help="Base directory for clones", default="./repos")
+    parser.add_argument("--cache-dir", help="Directory of local mirrors reused across runs", default=None)
+    parser.add_argument("--recurse-submodules", help="Also clone submodules", action="store_true")
+    parser.add_argument("--jobs", help="Parallel submodule fetches (default 8)", type=int, default=None)
+    parser.add_argument("--backend", help="Clone backend", choices=["gitpython", "pygit2"], default="gitpython")
     args = parser.parse_args()
 
+    _init_logging()
     logger.info("=== Repository Cloning Script ===")
 
     repo_url = args.url
@@ -180,19 +510,19 @@ def main():
         return
 
     # Initialize cloner
-    cloner = RepoCloner(base_dir=args.base_dir)
-
-    # Clone single repository
-    try:
-        cloner.clone_repository(repo_url, branch=args.branch, depth=args.depth)
-        logger.info("\n=== Clone Results ===")
-        logger.info(f"[OK] {repo_url}: success")
-    except Exception as e:
-        logger.info("\n=== Clone Results ===")
-        logger.error(f"[FAIL] {repo_url}: {e}")
-
-    # Save history
-    cloner.save_clone_history()
+    with RepoCloner(base_dir=args.base_dir, cache_dir=args.cache_dir, backend=args.backend) as cloner:
+        # Clone single repository
+        try:
+            cloner.clone_repository(repo_url, branch=args.branch, depth=args.depth, blobless=args.blobless,
+                                    recurse_submodules=args.recurse_submodules, jobs=args.jobs)
+            logger.info("\n=== Clone Results ===")
+            logger.info(f"[OK] {repo_url}: success")
+        except Exception as e:
+            logger.info("\n=== Clone Results ===")
+            logger.error(f"[FAIL] {repo_url}: {e}")
+
+        # Save history
+        cloner.save_clone_history()
     
     logger.info("\n=== Cloning Complete ===")
 
@@ -4,20 +4,48 @@ Ensures all systems are working before hackathon demo.
 """
 import sys
 from pathlib import Path
-import json
 import os
+import functools
 
 # Add project to path
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root / "scripts"))
 
+# Deletes every ASCII character that is not alphanumeric or underscore
+_NAME_DELETE_TABLE = str.maketrans("", "", "".join(
+    ch for ch in map(chr, range(128)) if not (ch.isalnum() or ch == "_")
+))
+
 def _normalize_name(value):
     if value is None:
         return ""
     cleaned = value.strip().replace(" ", "_")
-    cleaned = "".join(ch for ch in cleaned if ch.isalnum() or ch == "_")
+    if cleaned.isascii():
+        cleaned = cleaned.translate(_NAME_DELETE_TABLE)
+    else:
+        cleaned = "".join(ch for ch in cleaned if ch.isalnum() or ch == "_")
     return cleaned.upper()
 
+@functools.lru_cache(maxsize=8)
+def _load_history_cached(path_str, mtime_ns, size):
+    from branch_manager import decode_history_line
+    with open(path_str, 'rb') as f:
+        return tuple(decode_history_line(line) for line in f if line.strip())
+
+def _load_history(history_file):
+    """Parse a JSONL history file, reusing the result until it changes"""
+    # Appends within one mtime tick still change the size
+    st = os.stat(history_file)
+    return _load_history_cached(str(history_file), st.st_mtime_ns, st.st_size)
+
+def _safe_stat(path):
+    """Return (exists, size) with a single stat call"""
+    try:
+        return True, os.stat(path).st_size
+    except FileNotFoundError:
+        return False, 0
+
+@functools.lru_cache(maxsize=None)
 def get_expected_branch_name():
     team_name = _normalize_name(os.getenv("TEAM_NAME", "RIFT_ORGANISERS"))
     leader_name = _normalize_name(os.getenv("LEADER_NAME", "SAIYAM_KUMAR"))
@@ -58,17 +86,18 @@ def test_deliverable_1():
         print(f"  [OK] {branch['branch_name']}")
     
     # Verify file
-    history_file = project_root / "data" / "branch_history.json"
+    history_file = project_root / "data" / "branch_history.jsonl"
     
     print(f"\n[CHECK] Verifying {history_file}")
-    if not history_file.exists():
+    exists, size = _safe_stat(history_file)
+    if not exists:
         print(f"  [FAIL] File does not exist")
         return False
     
-    history = json.loads(history_file.read_text())
+    history = _load_history(history_file)
     print(f"  [CHECK] Branches created: {len(created_branches)}")
     print(f"  [CHECK] Branches saved: {len(history)}")
-    print(f"  [CHECK] File size: {history_file.stat().st_size} bytes")
+    print(f"  [CHECK] File size: {size} bytes")
     
     # Verify naming convention
     expected_branch = get_expected_branch_name()
@@ -94,11 +123,11 @@ def test_deliverable_2():
     print("="*70)
     
     required_files = [
-        "data/branch_history.json",
+        "data/branch_history.jsonl",
         "data/ci_pipeline_timeline.json",
         "data/iteration_tracker.json",
         "data/deployment_history.json",
-        "data/git_automation_history.json"
+        "data/git_automation_history.jsonl"
     ]
     
     print("\n[CHECK] Verifying CI/CD data files:")
@@ -107,9 +136,9 @@ def test_deliverable_2():
     
     for file_path in required_files:
         full_path = project_root / file_path
-        exists = full_path.exists()
-        size = full_path.stat().st_size if exists else 0
-        has_data = size > 2  # More than just "[]"
+        exists, size = _safe_stat(full_path)
+        # JSON files start as "[]", JSONL history files start empty
+        has_data = size > 0 if full_path.suffix == ".jsonl" else size > 2
         
         if exists and has_data:
             status = "[OK]     "
@@ -146,13 +175,13 @@ def test_branch_naming_convention():
     print("  BONUS: Branch Naming Convention Test")
     print("="*70)
     
-    history_file = project_root / "data" / "branch_history.json"
+    history_file = project_root / "data" / "branch_history.jsonl"
     
     if not history_file.exists():
         print("  [SKIP] No branch history file")
         return False
     
-    history = json.loads(history_file.read_text())
+    history = _load_history(history_file)
     
     if not history:
         print("  [SKIP] No branches in history")
@@ -160,20 +189,17 @@ def test_branch_naming_convention():
     
     print(f"\n[TEST] Verifying {len(history)} branches:")
     
-    all_valid = True
-    for idx, branch in enumerate(history, 1):
-        name = branch['branch_name']
-        expected_branch = get_expected_branch_name()
-        valid = name == expected_branch
-        status = "[OK]" if valid else "[FAIL]"
-        
-        # Show first and last branch
-        if idx <= 2 or idx == len(history):
-            print(f"  {status} {name}")
-        elif idx == 3:
+    expected_branch = get_expected_branch_name()
+    all_valid = all(branch['branch_name'] == expected_branch for branch in history)
+    
+    # Show first and last branch
+    shown = list(history[:2]) + list(history[2:][-1:])
+    for pos, branch in enumerate(shown):
+        if pos == 2 and len(history) > 3:
             print(f"  ... ({len(history) - 3} more branches)")
-        
-        all_valid = all_valid and valid
+        name = branch['branch_name']
+        status = "[OK]" if name == expected_branch else "[FAIL]"
+        print(f"  {status} {name}")
     
     if all_valid:
         print("\n  [PASS] All branches follow TEAM_NAME_LEADER_NAME_AI_Fix convention [OK]")
@@ -46,6 +46,29 @@ class TestBranchManager:
     def test_branch_prefix_constant(self):
         """Test branch suffix constant"""
         assert BranchManager.BRANCH_SUFFIX == "AI_Fix"
+    
+    def test_history_writes_deferred_in_context(self, tmp_path):
+        """Test entries are appended once the with-block exits"""
+        manager = BranchManager(team_name="Team One", leader_name="Leader One")
+        manager.history_file = tmp_path / "branch_history.jsonl"
+        
+        with manager:
+            manager.create_branch_entry(issue_type="bug", issue_id="1")
+            manager.create_branch_entry(issue_type="fix", issue_id="2")
+            assert not manager.history_file.exists()
+        
+        history = list(manager.iter_history())
+        assert [entry["issue_id"] for entry in history] == ["1", "2"]
+
+    def test_create_branch_invalid_name(self, tmp_path):
+        """Test an invalid branch name fails instead of raising"""
+        from git import Repo
+
+        repo = Repo.init(tmp_path)
+        repo.index.commit("initial")
+        manager = BranchManager(repo=repo)
+
+        assert manager.create_branch("bad..name", base_branch=repo.active_branch.name) is False
 
 
 class TestGitAutomation:
@@ -60,6 +83,325 @@ class TestGitAutomation:
         """Test that repo_clone module can be imported"""
         from repo_clone import RepoCloner
         assert RepoCloner is not None
+    
+    def test_check_status_porcelain(self, tmp_path):
+        """Test status parsing of modified, staged and untracked files"""
+        from git import Repo
+        from git_automation import GitAutomation
+        
+        repo = Repo.init(tmp_path)
+        (tmp_path / "tracked.txt").write_text("one")
+        (tmp_path / "data").mkdir()
+        (tmp_path / "data" / ".gitkeep").write_text("")
+        repo.index.add(["tracked.txt", "data/.gitkeep"])
+        repo.index.commit("initial")
+        
+        (tmp_path / "tracked.txt").write_text("two")
+        (tmp_path / "new file.txt").write_text("new")
+        (tmp_path / "staged.txt").write_text("staged")
+        repo.index.add(["staged.txt"])
+        
+        status = GitAutomation(tmp_path).check_status()
+        
+        assert status["branch"] == repo.active_branch.name
+        assert status["modified"] == ["tracked.txt"]
+        assert status["staged"] == ["staged.txt"]
+        assert "new file.txt" in status["untracked"]
+        assert status["clean"] is False
+    
+    def test_add_files_stages_status_paths(self, tmp_path):
+        """Test add_all stages modified, deleted and untracked paths from status"""
+        from git import Repo
+        from git_automation import GitAutomation
+        
+        repo = Repo.init(tmp_path)
+        (tmp_path / "tracked.txt").write_text("one")
+        (tmp_path / "removed.txt").write_text("gone")
+        repo.index.add(["tracked.txt", "removed.txt"])
+        repo.index.commit("initial")
+        
+        (tmp_path / "tracked.txt").write_text("two")
+        (tmp_path / "removed.txt").unlink()
+        (tmp_path / "new.txt").write_text("new")
+        
+        git_auto = GitAutomation(tmp_path)
+        assert git_auto.add_files(add_all=True, status=git_auto.check_status())
+        
+        status = git_auto.check_status()
+        assert status["modified"] == []
+        assert status["untracked"] == []
+        assert {"tracked.txt", "removed.txt", "new.txt"} <= set(status["staged"])
+
+    def test_add_files_literal_pathspecs(self, tmp_path):
+        """Test status paths are staged literally, without glob matching"""
+        from git import Repo
+        from git_automation import GitAutomation
+
+        repo = Repo.init(tmp_path)
+        (tmp_path / "x*.txt").write_text("glob")
+        (tmp_path / "xy.txt").write_text("other")
+        repo.index.add(["x*.txt", "xy.txt"])
+        repo.index.commit("initial")
+
+        (tmp_path / "x*.txt").unlink()
+        (tmp_path / "xy.txt").write_text("changed")
+        names = [f"file_{i:04d}.txt" for i in range(3000)]
+        for name in names:
+            (tmp_path / name).write_text(name)
+
+        git_auto = GitAutomation(tmp_path)
+        status = {"modified": ["x*.txt"], "untracked": names}
+        assert git_auto.add_files(add_all=True, status=status)
+
+        staged = set(repo.git.diff('--cached', '--name-only', '-z').split('\0'))
+        assert "x*.txt" in staged
+        assert "xy.txt" not in staged
+        assert set(names) <= staged
+
+    def test_ensure_ai_fix_branch_rereads_head(self, tmp_path):
+        """Test an outside checkout is noticed instead of trusting the cached branch"""
+        from git import Repo
+        from git_automation import GitAutomation
+
+        repo = Repo.init(tmp_path)
+        (tmp_path / "tracked.txt").write_text("one")
+        repo.index.add(["tracked.txt"])
+        repo.index.commit("initial")
+        base_branch = repo.active_branch.name
+
+        git_auto = GitAutomation(tmp_path)
+        target = git_auto.ensure_ai_fix_branch(base_branch=base_branch)
+        git_auto.check_status()
+        repo.git.checkout(base_branch)
+
+        assert git_auto.ensure_ai_fix_branch(base_branch=base_branch) == target
+        assert repo.active_branch.name == target
+        assert git_auto.branch_manager.get_current_branch() == target
+
+    def test_commit_with_author(self, tmp_path):
+        """Test author_name/author_email set the commit author"""
+        from git import Repo
+        from git_automation import GitAutomation
+
+        repo = Repo.init(tmp_path)
+        (tmp_path / "tracked.txt").write_text("one")
+        repo.index.add(["tracked.txt"])
+
+        git_auto = GitAutomation(tmp_path)
+        commit_hash = git_auto.commit("add tracked", author_name="Bot", author_email="bot@example.com")
+
+        assert repo.head.commit.hexsha.startswith(commit_hash)
+        assert repo.head.commit.author.name == "Bot"
+        assert repo.head.commit.author.email == "bot@example.com"
+
+    def test_short_lived_instance_flushes_history(self, tmp_path):
+        """Test dropping an instance right after a write neither joins the writer nor loses data"""
+        import gc
+        import threading
+        from git import Repo
+        from git_automation import GitAutomation
+
+        Repo.init(tmp_path).index.commit("initial")
+        for idx in range(5):
+            GitAutomation(tmp_path)._save_operation({"action": "test", "idx": idx})
+        gc.collect()
+        for thread in threading.enumerate():
+            if thread.name.startswith("history-io"):
+                thread.join(timeout=5)
+
+        lines = (tmp_path / "data" / "git_automation_history.jsonl").read_text().splitlines()
+        assert len(lines) == 5
+
+    def test_push_rereads_head(self, tmp_path):
+        """Test push checks the real HEAD after an outside checkout"""
+        from git import Repo
+        from git_automation import GitAutomation
+
+        repo = Repo.init(tmp_path, initial_branch="main")
+        (tmp_path / "tracked.txt").write_text("one")
+        repo.index.add(["tracked.txt"])
+        repo.index.commit("initial")
+        repo.git.checkout("-b", "feature")
+
+        git_auto = GitAutomation(tmp_path)
+        assert git_auto.check_status()["branch"] == "feature"
+        repo.git.checkout("main")
+
+        # Blocked as a push to main instead of pushing the cached "feature"
+        assert git_auto.push() is False
+
+
+def _init_remote(path, files):
+    """Create a bare repository at path with one commit on main holding files"""
+    from git import Repo
+
+    work = Repo.init(path.with_name(path.name + "-work"), initial_branch="main")
+    for name, content in files.items():
+        (Path(work.working_tree_dir) / name).write_text(content)
+    work.index.add(list(files))
+    work.index.commit("initial")
+    work.clone(path, bare=True)
+    return work
+
+
+class TestRepoCloner:
+    """Tests for RepoCloner against local file:// remotes"""
+
+    def test_clone_multiple_same_basename(self, tmp_path):
+        """Test URLs sharing a basename clone one after another, last one wins"""
+        from git import Repo
+        from repo_clone import RepoCloner
+
+        _init_remote(tmp_path / "org-a" / "utils.git", {"owner.txt": "a"})
+        _init_remote(tmp_path / "org-b" / "utils.git", {"owner.txt": "b"})
+        url_b = (tmp_path / "org-b" / "utils.git").as_uri()
+        repo_list = [
+            {"url": (tmp_path / "org-a" / "utils.git").as_uri()},
+            {"url": url_b},
+        ]
+
+        with RepoCloner(base_dir=tmp_path / "repos") as cloner:
+            results = cloner.clone_multiple(repo_list)
+
+        assert [result["status"] for result in results] == ["success", "success"]
+        assert Repo(tmp_path / "repos" / "utils").remotes.origin.url == url_b
+        assert (tmp_path / "repos" / "utils" / "owner.txt").read_text() == "b"
+        assert sorted(path.name for path in (tmp_path / "repos").iterdir()) == ["utils"]
+
+    def test_clone_refreshes_existing_checkout(self, tmp_path):
+        """Test a second clone of the same remote fetches and resets in place"""
+        from repo_clone import RepoCloner
+
+        work = _init_remote(tmp_path / "project.git", {"app.txt": "v1"})
+        url = (tmp_path / "project.git").as_uri()
+
+        with RepoCloner(base_dir=tmp_path / "repos") as cloner:
+            repo = cloner.clone_repository(url)
+            marker = Path(repo.git_dir) / "refresh-marker"
+            marker.write_text("kept unless recloned")
+            checkout = Path(repo.working_tree_dir)
+            (checkout / "app.txt").write_text("local edit")
+            (checkout / "scratch.txt").write_text("untracked")
+
+            (Path(work.working_tree_dir) / "app.txt").write_text("v2")
+            work.index.add(["app.txt"])
+            head = work.index.commit("update")
+            work.git.push(str(tmp_path / "project.git"), "main")
+
+            repo = cloner.clone_repository(url)
+
+        assert marker.exists()
+        assert repo.head.commit.hexsha == head.hexsha
+        assert (checkout / "app.txt").read_text() == "v2"
+        assert not (checkout / "scratch.txt").exists()
+
+    def test_clone_existing_checkout_unshallows(self, tmp_path):
+        """Test refreshing a shallow checkout with depth=None fetches full history"""
+        from repo_clone import RepoCloner
+
+        work = _init_remote(tmp_path / "project.git", {"app.txt": "v1"})
+        (Path(work.working_tree_dir) / "app.txt").write_text("v2")
+        work.index.add(["app.txt"])
+        work.index.commit("update")
+        work.git.push(str(tmp_path / "project.git"), "main")
+        url = (tmp_path / "project.git").as_uri()
+
+        with RepoCloner(base_dir=tmp_path / "repos") as cloner:
+            shallow = cloner.clone_repository(url)
+            assert len(list(shallow.iter_commits())) == 1
+            repo = cloner.clone_repository(url, depth=None)
+
+        assert len(list(repo.iter_commits())) == 2
+        assert not (Path(repo.git_dir) / "shallow").exists()
+
+    def test_clone_existing_checkout_switches_branch(self, tmp_path):
+        """Test refreshing with another branch checks it out with checkout -B"""
+        from repo_clone import RepoCloner
+
+        work = _init_remote(tmp_path / "project.git", {"app.txt": "main"})
+        work.git.checkout("-b", "dev")
+        (Path(work.working_tree_dir) / "app.txt").write_text("dev")
+        work.index.add(["app.txt"])
+        dev_head = work.index.commit("dev work")
+        work.git.push(str(tmp_path / "project.git"), "dev")
+        url = (tmp_path / "project.git").as_uri()
+
+        with RepoCloner(base_dir=tmp_path / "repos") as cloner:
+            cloner.clone_repository(url)
+            repo = cloner.clone_repository(url, branch="dev")
+
+        assert repo.active_branch.name == "dev"
+        assert repo.head.commit.hexsha == dev_head.hexsha
+        assert (Path(repo.working_tree_dir) / "app.txt").read_text() == "dev"
+
+    def test_clone_replaces_checkout_of_other_remote(self, tmp_path):
+        """Test a checkout whose origin differs is recloned, not updated"""
+        from git import Repo
+        from repo_clone import RepoCloner
+
+        _init_remote(tmp_path / "first" / "project.git", {"owner.txt": "first"})
+        _init_remote(tmp_path / "second" / "project.git", {"owner.txt": "second"})
+        url = (tmp_path / "second" / "project.git").as_uri()
+
+        with RepoCloner(base_dir=tmp_path / "repos") as cloner:
+            cloner.clone_repository((tmp_path / "first" / "project.git").as_uri())
+            repo = cloner.clone_repository(url)
+
+        assert repo.remotes.origin.url == url
+        assert (tmp_path / "repos" / "project" / "owner.txt").read_text() == "second"
+        assert sorted(path.name for path in (tmp_path / "repos").iterdir()) == ["project"]
+
+    def test_clone_uses_reference_mirror(self, tmp_path):
+        """Test cache_dir keeps a bare mirror and clones stay self-contained"""
+        from repo_clone import RepoCloner
+
+        _init_remote(tmp_path / "project.git", {"app.txt": "v1"})
+        url = (tmp_path / "project.git").as_uri()
+
+        with RepoCloner(base_dir=tmp_path / "repos", cache_dir=tmp_path / "cache") as cloner:
+            repo = cloner.clone_repository(url, depth=None)
+
+        assert (tmp_path / "cache" / "project.git" / "HEAD").exists()
+        assert not (Path(repo.git_dir) / "objects" / "info" / "alternates").exists()
+        assert (Path(repo.working_tree_dir) / "app.txt").read_text() == "v1"
+
+    def test_clone_multiple_keeps_input_order(self, tmp_path):
+        """Test results line up with repo_list whatever order clones finish in"""
+        from repo_clone import RepoCloner
+
+        repo_list = []
+        for name in ("alpha", "beta", "gamma"):
+            _init_remote(tmp_path / f"{name}.git", {"name.txt": name})
+            repo_list.append({"url": (tmp_path / f"{name}.git").as_uri()})
+        repo_list.insert(1, {"url": (tmp_path / "missing.git").as_uri()})
+
+        with RepoCloner(base_dir=tmp_path / "repos") as cloner:
+            results = cloner.clone_multiple(repo_list, max_workers=4)
+
+        assert [result["repo"] for result in results] == [entry["url"] for entry in repo_list]
+        assert [result["status"] for result in results] == ["success", "failed", "success", "success"]
+
+    def test_pygit2_backend_single_branch_no_tags(self, tmp_path):
+        """Test the pygit2 backend honours single_branch/no_tags and records failures"""
+        pytest.importorskip("pygit2", minversion="1.15")
+        from git import GitCommandError
+        from repo_clone import RepoCloner
+
+        work = _init_remote(tmp_path / "project.git", {"app.txt": "v1"})
+        work.create_tag("v1")
+        work.create_head("dev")
+        work.git.push(str(tmp_path / "project.git"), "dev", "--tags")
+        url = (tmp_path / "project.git").as_uri()
+
+        with RepoCloner(base_dir=tmp_path / "repos", backend="pygit2") as cloner:
+            repo = cloner.clone_repository(url, branch="main", depth=None)
+            with pytest.raises(GitCommandError):
+                cloner.clone_repository((tmp_path / "missing.git").as_uri())
+
+        assert "origin/dev" not in [ref.name for ref in repo.remotes.origin.refs]
+        assert repo.tags == []
+        assert repo.git.config("remote.origin.tagOpt") == "--no-tags"
+        assert [record.status for record in cloner.clone_history] == ["success", "failed"]
 
 
 def test_project_structure():